@@ -1,9 +1,145 @@
-from PIL import Image
+from PIL import Image, ImageChops
 from io import BytesIO
+from functools import lru_cache
+from itertools import accumulate
+import hashlib
+import zlib
+import os
+from concurrent.futures import ThreadPoolExecutor
+from array import array
+import threading
+import shutil
+import stat
+from tempfile import SpooledTemporaryFile, mkstemp
+
+try:
+    # optional: libdeflate bindings (pip install deflate), a faster Flate compressor than zlib at a similar ratio
+    import deflate
+except ImportError:
+    deflate = None
  
 
+# lookup table of every two-char lowercase hex string ("00".."ff") to its integer value,
+# built once at import so hex_to_rgb can do plain dict lookups instead of int(..., 16) parsing
+_HEX2 = {f"{i:02x}": i for i in range(256)}
+
+# translation table escaping the characters that are special inside PDF literal strings "(...)", applied in a single str.translate pass
+_PDF_ESC = str.maketrans({"\\": "\\\\", "(": "\\(", ")": "\\)"})
+
+# size of the output file write buffer used by PDF.save
+_WRITE_BUFFER_SIZE = 1 << 20  # 1 MiB
+
+# Flate level used for page content streams for each PDF.save compress_streams choice, None writes them uncompressed (levels above 9 need libdeflate, zlib caps them at 9)
+_STREAM_LEVELS = {"none": None, "fast": 1, "best": 12}
+
+# objects added before save() (embedded images) are spilled to a temporary file, kept in memory up to this size and moved to disk beyond it
+_SPILL_MAX_SIZE = 8 << 20  # 8 MiB
+# chunk size used to copy the spilled objects into the output file
+_SPILL_COPY_SIZE = 64 << 10  # 64 KiB
+
+# bytes %-style templates for the per-line drawing commands serialized by TextBuf, the color (rg / RG) and font (Tf) operators are emitted separately and only when they change
+_BG_FMT = b"%.2f %.2f %.2f %.2f re f"  # background rectangle: x, y, width, height
+_TEXT_FMT = b"%.2f %.2f Td (%s) Tj"  # a text line: position (or offset from the previous line in the same text object), text
+_LINE_FMT = b"%.2f %.2f m %.2f %.2f l S"  # underline/strikethrough: start x, y, end x, y
+
+
+# compresses data into a zlib (FlateDecode) stream, using libdeflate when it is installed and the standard zlib module otherwise
+def _flate(data, level=6):
+    """
+    Compress bytes for a /FlateDecode stream.
+
+    Args:
+        data (bytes): The data to compress.
+        level (int): Compression level (1-9 with zlib, up to 12 with libdeflate).
+
+    Returns:
+        bytes: The zlib-wrapped compressed data.
+    """
+    if deflate is not None:
+        return deflate.zlib_compress(data, level)
+    return zlib.compress(data, min(level, 9))
+
+
+# applies the PNG "Up" filter to an 8-bit image, for a FlateDecode stream with /Predictor 15
+def _png_up_filter(img):
+    """
+    PNG Up-filter the rows of an 8-bit "L" or "RGB" image.
+
+    Args:
+        img (Image): The image to filter.
+
+    Returns:
+        bytes: Every row prefixed with the filter type byte (2) and holding the
+        per-byte difference to the row above (mod 256).
+    """
+    # the row differences are computed by Pillow in C: subtract a copy shifted down by one row (its first row is all zero, so the first image row is kept as is)
+    width, height = img.size
+    above = Image.new(img.mode, img.size, 0)
+    above.paste(img.crop((0, 0, width, height - 1)), (0, 1))
+    data = ImageChops.subtract_modulo(img, above).tobytes()
+    # only the filter type bytes are added in Python, one per row rather than one operation per pixel
+    stride = width * len(img.getbands())
+    rows = memoryview(data)
+    return b"\x02" + b"\x02".join([rows[i:i + stride] for i in range(0, len(data), stride)])
+
+
+# start of frame markers of the JPEG variants PDF's DCTDecode filter can read (baseline, extended sequential and progressive Huffman coding)
+_JPEG_SOF_MARKERS = (0xC0, 0xC1, 0xC2)
+# JPEG markers that stand alone without a length field (TEM and the RSTn restart markers)
+_JPEG_STANDALONE_MARKERS = frozenset((0x01, *range(0xD0, 0xD8)))
+
+
+# reads the size and channel count of a JPEG from its start of frame segment, so a JPEG can be embedded without Pillow decoding anything
+def _jpeg_info(data):
+    """
+    Parse the header of JPEG file data.
+
+    Args:
+        data (bytes): The complete JPEG file.
+
+    Returns:
+        Tuple[int, int, str] | None: Width and height in pixels and the PDF color
+        space (/DeviceGray or /DeviceRGB), or None if the data is not an 8-bit
+        gray or RGB JPEG that DCTDecode can embed as is.
+    """
+    if data[:2] != b"\xff\xd8":  # SOI, every JPEG starts with it
+        return None
+    i, end = 2, len(data)
+    # walk the marker segments up to the start of frame, each is 0xFF, the marker byte and (for most) a 2 byte big endian length that includes itself
+    while i + 4 <= end:
+        if data[i] != 0xFF:
+            return None
+        marker = data[i + 1]
+        if marker == 0xFF:
+            # fill byte before the actual marker
+            i += 1
+            continue
+        if marker in _JPEG_STANDALONE_MARKERS:
+            i += 2
+            continue
+        if marker in (0xD9, 0xDA):
+            # end of image or start of scan before any frame header
+            return None
+        if 0xC0 <= marker <= 0xCF and marker not in (0xC4, 0xC8, 0xCC):
+            # start of frame: precision, height, width, number of components
+            if marker not in _JPEG_SOF_MARKERS or i + 10 > end or data[i + 4] != 8:
+                return None
+            height = int.from_bytes(data[i + 5:i + 7], "big")
+            width = int.from_bytes(data[i + 7:i + 9], "big")
+            components = data[i + 9]
+            if components == 1:
+                return width, height, "/DeviceGray"
+            if components == 3:
+                return width, height, "/DeviceRGB"
+            # CMYK and other layouts need a different color space (and possibly /Decode), leave them to Pillow
+            return None
+        i += 2 + int.from_bytes(data[i + 2:i + 4], "big")
+    return None
+
+
 # it converts a hex color string (ex. "#FF0000") to an RGB tuple
 # Example: "#FF0000" to (255, 0, 0)
+@lru_cache(maxsize=256)  # documents reuse a small palette, so cache the parsed results
 def hex_to_rgb(hex_color):
     """
     Convert a hex color string (e.g. '#FF0000' or '#F00') to an (R, G, B) tuple.
@@ -18,16 +154,277 @@ def hex_to_rgb(hex_color):
     Raises:
         ValueError: If the input is not a valid hex color format.
     """
-    hex_color = hex_color.strip().lstrip("#")  # remove the # from the left
-    if len(hex_color) == 3:
+    h = hex_color.strip().lstrip("#").lower()  # remove the # from the left
+    if len(h) == 3:
         # Expand the 3 char shorthand to 6
-        hex_color = "".join(c * 2 for c in hex_color)
-    if len(hex_color) != 6:
-        raise ValueError(f"Invalid hex color: {hex_color}")
-    r = int(hex_color[0:2], 16)  # hexadecimal to integer
-    g = int(hex_color[2:4], 16)
-    b = int(hex_color[4:6], 16)
-    return (r, g, b)
+        h = h[0] * 2 + h[1] * 2 + h[2] * 2
+    if len(h) != 6:
+        raise ValueError(f"Invalid hex color: {h}")
+    try:
+        # hexadecimal to integer via the precomputed table
+        return (_HEX2[h[0:2]], _HEX2[h[2:4]], _HEX2[h[4:6]])
+    except KeyError:
+        raise ValueError(f"Invalid hex color: {h}") from None
+
+
+# normalizes a hashable color argument for the PDF color operators, memoized with a bounded cache so generated palettes (gradients, heatmaps) can't grow it without limit
+@lru_cache(maxsize=1024)
+def _normalize_color(key):
+    """
+    Normalize a color argument (cached).
+
+    Args:
+        key (str|tuple): Named color, hex string, or RGB tuple.
+
+    Returns:
+        tuple: (r, g, b, rgb) where r, g, b are floats in [0, 1] and rgb is the
+        preformatted "r.rrr g.ggg b.bbb" operand string.
+    """
+    named = Page._COLOR_MAP_F.get(key.lower()) if isinstance(key, str) else None
+    if named:
+        # built-in color names are already normalized
+        r, g, b = named
+    else:
+        # normalize RGB color to range [0, 1] for PDF color values
+        r, g, b = [max(0, min(255, int(v))) / 255 for v in Page.parse_color(key)]
+    return (r, g, b, f"{r:.3f} {g:.3f} {b:.3f}")
+
+
+# wraps text into lines, memoized so the same paragraph laid out again with the same size and width (e.g. repeated labels in a grid) is only wrapped once
+@lru_cache(maxsize=4096)
+def _wrap_lines(text, max_width, font_size, algorithm="greedy"):
+    """
+    Wrap a text string into lines that fit within max_width (cached).
+
+    Args:
+        text (str): The text to wrap.
+        max_width (float): Maximum allowed width in points for each line.
+        font_size (int): Font size used to estimate character width.
+        algorithm (str): 'greedy' or 'optimal' line breaking.
+
+    Returns:
+        tuple: The wrapped lines (a tuple, so the cached value can't be modified).
+
+    Raises:
+        ValueError: If the algorithm is not recognized.
+    """
+    # This code breaks a block of text into multiple lines so it fits within a certain width on the page. It guesses how many characters can fit on a line based on the font size, then adds words one by one until the line is full. When it reaches the limit, it starts a new line. The result is a neatly wrapped version of the original text
+    
+    # This method doesn't use actual font metrics, it uses a simple estimate (0.5 * font_size), which is a fast but not so precise way to guess average character width
+    
+    avg_char_width = 0.5 * font_size
+    max_chars = int(max_width / avg_char_width)
+    words = text.split()
+    if algorithm == "greedy":
+        lines, current_line = [], ""
+        for word in words:
+            test_line = f"{current_line} {word}".strip()
+            if len(test_line) <= max_chars:
+                current_line = test_line
+            else:
+                # a first word that is longer than the line already starts a new one, so there is no empty line to emit
+                if current_line:
+                    lines.append(current_line)
+                current_line = word
+        if current_line:
+            lines.append(current_line)
+        return tuple(lines)
+    if algorithm != "optimal":
+        raise ValueError(f"Unknown wrap algorithm: {algorithm}")
+    # each word contributes its length plus one trailing space, so the words from i to j-1 take up cum[j] - cum[i] - 1 characters on a line
+    cum = [0, *accumulate(len(word) + 1 for word in words)]
+    breaks = Page._break_optimal(cum, max_chars)
+    return tuple(" ".join(words[i:j]) for i, j in zip(breaks, breaks[1:]))
+
+
+# pre-wraps texts so later add_text calls with the same settings hit the wrap cache
+def warmup_wrap_cache(texts, max_width, font_size, algorithm="greedy"):
+    """
+    Fill the text wrapping cache ahead of time.
+
+    Args:
+        texts (iterable): Strings that will be passed to add_text.
+        max_width (float): The max_width they will be wrapped to.
+        font_size (int): The font size they will be drawn with.
+        algorithm (str): 'greedy' or 'optimal' line breaking.
+    """
+    for text in texts:
+        _wrap_lines(text, max_width, font_size, algorithm)
+
+
+class TextBuf:
+    """
+    Struct-of-arrays storage for the text lines drawn on a page. Every line is one
+    index into a set of parallel arrays, and fonts and colors are interned into small
+    tables, so the numeric fields can be transformed in bulk (e.g. shifting all xs)
+    without re-parsing formatted commands.
+
+    Attributes:
+        xs (array): X-coordinate of each line in points.
+        ys (array): Y-coordinate (baseline) of each line in points.
+        widths (array): Estimated width of each line in points.
+        sizes (array): Font size of each line in points.
+        font_idx (array): Index into font_table for each line.
+        color_idx (array): Index into color_table for the text color of each line.
+        bg_idx (array): Index into color_table for the background color, -1 for none.
+        flags (array): Decoration bits per line (UNDERLINE, STRIKE).
+        texts (list): Escaped line text encoded as Latin-1 bytes.
+        font_table (list): Interned "/FontRef size" operands as bytes.
+        color_table (list): Interned "r g b" color operands as bytes.
+    """
+
+    # decoration bits stored in flags
+    UNDERLINE = 1
+    STRIKE = 2
+
+    def __init__(self):
+        """
+        Initialize an empty text buffer.
+        """
+        # doubles keep the coordinates exactly as computed, so the emitted numbers don't change
+        self.xs = array("d")
+        self.ys = array("d")
+        self.widths = array("d")
+        self.sizes = array("d")
+        # table indices are (at least) 32 bit, a page can intern far more than 32767 distinct colors
+        self.font_idx = array("I")
+        self.color_idx = array("I")
+        self.bg_idx = array("i")
+        self.flags = array("B")
+        self.texts = []
+        self.font_table = []
+        self.color_table = []
+        # reverse lookups for the interning tables
+        self._font_lookup = {}
+        self._color_lookup = {}
+
+    def intern_font(self, font_op):
+        """
+        Return the index of a "/FontRef size" operand in font_table, adding it if new.
+
+        Args:
+            font_op (str): Font operand, e.g. "/HelveticaBold 16".
+
+        Returns:
+            int: Index of the operand in font_table.
+        """
+        index = self._font_lookup.get(font_op)
+        if index is None:
+            index = self._font_lookup[font_op] = len(self.font_table)
+            self.font_table.append(font_op.encode("latin1"))
+        return index
+
+    def intern_color(self, rgb):
+        """
+        Return the index of an "r g b" operand in color_table, adding it if new.
+
+        Args:
+            rgb (str): Color operand, e.g. "1.000 0.000 0.000".
+
+        Returns:
+            int: Index of the operand in color_table.
+        """
+        index = self._color_lookup.get(rgb)
+        if index is None:
+            index = self._color_lookup[rgb] = len(self.color_table)
+            self.color_table.append(rgb.encode("latin1"))
+        return index
+
+    def append(self, x, y, width, size, font, color, bg, flags, text):
+        """
+        Add a text line.
+
+        Args:
+            x (float): X-coordinate in points.
+            y (float): Y-coordinate (baseline) in points.
+            width (float): Estimated line width in points.
+            size (float): Font size in points.
+            font (int): Index returned by intern_font.
+            color (int): Index returned by intern_color for the text color.
+            bg (int): Index returned by intern_color for the background, or -1.
+            flags (int): Combination of UNDERLINE and STRIKE.
+            text (bytes): Escaped line text encoded as Latin-1.
+        """
+        self.xs.append(x)
+        self.ys.append(y)
+        self.widths.append(width)
+        self.sizes.append(size)
+        self.font_idx.append(font)
+        self.color_idx.append(color)
+        self.bg_idx.append(bg)
+        self.flags.append(flags)
+        self.texts.append(text)
+
+    def serialize(self):
+        """
+        Build the PDF drawing commands for all lines.
+
+        Consecutive lines with the same font and color (e.g. the wrapped lines of one
+        add_text call) share a single text object, and the color and font operators
+        are only issued when they differ from the current graphics state.
+
+        Returns:
+            list: One bytes chunk per text object, background, decoration or state change.
+        """
+        # bind everything to locals once, the loop below runs for every line on the page
+        xs, ys, widths, sizes = self.xs, self.ys, self.widths, self.sizes
+        font_idx, color_idx, bg_idx, flags = self.font_idx, self.color_idx, self.bg_idx, self.flags
+        underline, strike = self.UNDERLINE, self.STRIKE
+        # the state operators are built once per interned font and color instead of once per line
+        font_ops = [font_op + b" Tf " for font_op in self.font_table]
+        fill_ops = [rgb + b" rg" for rgb in self.color_table]
+        stroke_ops = [rgb + b" RG" for rgb in self.color_table]
+        chunks = []
+        # commands of the open text object, it is closed with ET once a line can't continue it
+        run = []
+        run_x = run_y = None
+        # font and colors (as table indices) set by the commands emitted so far, a page stream starts with none set
+        cur_font = fill = stroke = None
+        for i, text in enumerate(self.texts):
+            x, y = xs[i], ys[i]
+            font, color, bg = font_idx[i], color_idx[i], bg_idx[i]
+            if run and bg < 0 and font == cur_font and color == fill:
+                # Td inside a text object moves relative to the previous line, the offset is taken between the rounded origins so the positions match the absolute ones exactly
+                run.append(_TEXT_FMT % (round(x, 2) - run_x, round(y, 2) - run_y, text))
+            else:
+                if run:
+                    chunks.append(b"\n".join(run) + b" ET")
+                    run = []
+                # background rectangle behind the text, text height is the font size (painted outside the text object, before the text)
+                if bg >= 0:
+                    if fill != bg:
+                        chunks.append(fill_ops[bg])
+                        fill = bg
+                    chunks.append(_BG_FMT % (x, y - 0.2 * sizes[i], widths[i], sizes[i]))
+                if fill != color:
+                    run.append(fill_ops[color])
+                    fill = color
+                # the font is part of the graphics state too, so it carries over from one text object to the next
+                run.append(b"BT " + (font_ops[font] if font != cur_font else b"") + _TEXT_FMT % (x, y, text))
+                cur_font = font
+            run_x, run_y = round(x, 2), round(y, 2)
+
+            flag = flags[i]
+            if flag:
+                # decorations are paths, so the text object has to be closed before drawing them
+                chunks.append(b"\n".join(run) + b" ET")
+                run = []
+                width, size = widths[i], sizes[i]
+                # decorations are stroked in the text color
+                if stroke != color:
+                    chunks.append(stroke_ops[color])
+                    stroke = color
+                # underline slightly below the baseline
+                if flag & underline:
+                    uy = y - size * 0.15
+                    chunks.append(_LINE_FMT % (x, uy, x + width, uy))
+                # strikethrough through the middle of the text
+                if flag & strike:
+                    sy = y + size * 0.3
+                    chunks.append(_LINE_FMT % (x, sy, x + width, sy))
+        if run:
+            chunks.append(b"\n".join(run) + b" ET")
+        return chunks
 
 
 class Page:
@@ -40,9 +437,9 @@ class Page:
         height (int): Height of the page in points.
         padding_h (int): Horizontal padding from page edges.
         padding_v (int): Vertical padding from page edges.
-        text_elements (list): PDF text drawing commands.
+        text_elements (TextBuf): The text lines drawn on this page, serialized by get_stream_bytes.
         image_elements (list): Image insertion instructions with optional captions.
-        image_usages (list): Tracks image names used on this page.
+        image_usages (dict): Maps image names used on this page to their object numbers.
         links (list): List of hyperlinks tied to specific text regions.
     """
 
@@ -69,6 +466,15 @@ class Page:
         "lime": (0, 255, 0),
     }
 
+    # The same named colors already normalized to [0, 1], computed once when the class is created
+    _COLOR_MAP_F = {name: (r / 255, g / 255, b / 255) for name, (r, g, b) in color_MAP.items()}
+
+    # Whether add_text and add_image print a warning when content may be cut off by the padding box, set to False (on the class or a single page) to skip the check
+    check_bounds = True
+
+    # Cache of (font, bold, italic) -> font reference used in content streams (e.g. "/HelveticaBold"), documents only use a handful of variants
+    _FONT_REF_CACHE = {}
+
     # Initialize a Page instance with dimensions and optional padding
     def __init__(self, width, height, padding_horizontal=50, padding_vertical=50):
         """
@@ -84,13 +490,82 @@ class Page:
         self.height = height  # height of the page
         self.padding_h = padding_horizontal  # horizontal padding
         self.padding_v = padding_vertical  # vertical padding
-        self.text_elements = []  # list of text drawing instructions
+        self.text_elements = TextBuf()  # text lines to draw, stored as parallel arrays
         self.image_elements = []  # list of image drawing instructions
-        self.image_usages = []  # tracking image usage instances
+        self.image_usages = {}  # image names used on this page -> object number (filled in by PDF.save)
         self.links = []  # list of hyperlinks associated with text
 
+    # Build the PDF font reference for a (font, bold, italic) combination and remember it in _FONT_REF_CACHE
+    @staticmethod
+    def _compute_font_ref(key):
+        """
+        Compute the font resource reference for a font variant.
+
+        Args:
+            key (tuple): (font, bold, italic) as passed to add_text.
+
+        Returns:
+            str: The font reference, e.g. "/HelveticaBoldOblique".
+        """
+        font, bold, italic = key
+        base_font = font.replace("-", "") # removes any dashes from the font name to normalize it like "Helvetica-Bold" becomes "HelveticaBold"
+        if bold and italic:
+            font_key = f"{base_font}BoldOblique"
+        elif bold:
+            font_key = f"{base_font}Bold"
+        elif italic:
+            font_key = f"{base_font}Oblique"
+        else:
+            font_key = base_font
+        font_ref = f"/{font_key}" # formats the font name into pdf syntax by prefixing it with a slash (ex. /HelveticaBoldOblique), which is how fonts are referenced in PDF content streams
+        Page._FONT_REF_CACHE[key] = font_ref
+        return font_ref
+
+    # Parse a color argument (name, hex string or RGB tuple) into an RGB tuple with values in 0-255
+    @staticmethod
+    def parse_color(c):
+        """
+        Parse a color argument into an (R, G, B) tuple.
+
+        Args:
+            c (str|tuple|list): Named color, hex string, or RGB tuple/list.
+
+        Returns:
+            tuple: A 3-tuple (R, G, B) with values in range 0–255.
+
+        Raises:
+            ValueError: If the color name or hex string is not recognized.
+            TypeError: If the color is not a string or a 3-element tuple/list.
+        """
+        if isinstance(c, str):
+            if c.startswith("#"): # if it's a hex string
+                return hex_to_rgb(c)
+            named = Page.color_MAP.get(c.lower()) # if the color is a name like "black" or "BlAcK", case doesn't matter then check in the color_MAP (a single lookup)
+            if named is None:
+                raise ValueError(f"Unknown color: {c}") # otherwise raise a value error
+            return named
+        elif isinstance(c, (tuple, list)) and len(c) == 3: # if in rgb format
+            return tuple(c)
+        raise TypeError("color must be name, hex string, or (R,G,B) tuple")
+
+    # Parse and normalize a color argument, memoized by _normalize_color
+    @staticmethod
+    def _resolve_color(c):
+        """
+        Resolve a color argument into normalized RGB values for PDF color operators.
+
+        Args:
+            c (str|tuple|list): Named color, hex string, or RGB tuple/list.
+
+        Returns:
+            tuple: (r, g, b, rgb) where r, g, b are floats in [0, 1] and rgb is the
+            preformatted "r.rrr g.ggg b.bbb" operand string.
+        """
+        # lists are unhashable, so key them by their tuple form
+        return _normalize_color(tuple(c) if type(c) is list else c)
+
     # Word-wrap text into lines that fit within max_width using estimated char width
-    def wrap_text(self, text, max_width, font_size):
+    def wrap_text(self, text, max_width, font_size, algorithm="greedy"):
         """
         Wrap a given text string into lines that fit within the specified max width.
 
@@ -98,29 +573,51 @@ class Page:
             text (str): The text to wrap.
             max_width (float): Maximum allowed width in points for each line.
             font_size (int): Font size used to estimate character width.
+            algorithm (str): 'greedy' (first-fit, default) or 'optimal' (Knuth–Plass
+                style minimum-raggedness line breaking).
 
         Returns:
             list: A list of strings, each representing a wrapped line.
+
+        Raises:
+            ValueError: If the algorithm is not recognized.
         """
-        
-        # This code breaks a block of text into multiple lines so it fits within a certain width on the page. It guesses how many characters can fit on a line based on the font size, then adds words one by one until the line is full. When it reaches the limit, it starts a new line. The result is a neatly wrapped version of the original text
-        
-        # This method doesn't use actual font metrics, it uses a simple estimate (0.5 * font_size), which is a fast but not so precise way to guess average character width
-        
-        avg_char_width = 0.5 * font_size
-        max_chars = int(max_width / avg_char_width)
-        words = text.split()
-        lines, current_line = [], ""
-        for word in words:
-            test_line = f"{current_line} {word}".strip()
-            if len(test_line) <= max_chars:
-                current_line = test_line
-            else:
-                lines.append(current_line)
-                current_line = word
-        if current_line:
-            lines.append(current_line)
-        return lines
+        return list(_wrap_lines(text, max_width, font_size, algorithm))
+
+    # Optimal (Knuth–Plass style) line breaking: minimizes the total squared slack of all lines but the last
+    @staticmethod
+    def _break_optimal(cum, max_chars):
+        """
+        Compute line breaks minimizing the sum of squared trailing space over all lines
+        except the last one.
+
+        Args:
+            cum (list): Cumulative word widths (word length + 1 space), starting at 0.
+            max_chars (int): Maximum number of characters per line.
+
+        Returns:
+            list: Word indices where each line starts, followed by the word count.
+        """
+        # Dynamic programming over break points: cost[j] is the best cost for laying out the first j words, found by trying every previous break i whose line (words i..j-1) still fits. Walking i backwards lets us stop as soon as a line gets too long, so the work is O(words * words per line)
+        n = len(cum) - 1
+        cost = [0] + [float("inf")] * n
+        prev = [0] * (n + 1)
+        for j in range(1, n + 1):
+            for i in range(j - 1, -1, -1):
+                slack = max_chars - (cum[j] - cum[i] - 1)
+                if slack < 0 and i < j - 1:
+                    break  # adding more words only makes the line longer
+                # the last line and a single overlong word are free, every other line pays for its unused space
+                badness = 0 if j == n or slack < 0 else slack * slack
+                if cost[i] + badness < cost[j]:
+                    cost[j] = cost[i] + badness
+                    prev[j] = i
+        # walk the chosen break points back from the end
+        breaks, j = [n], n
+        while j > 0:
+            j = prev[j]
+            breaks.append(j)
+        return breaks[::-1] if n else [0]
 
     # Adds styled text to the page at a given position with many formatting options
     def add_text(
@@ -139,6 +636,7 @@ class Page:
         background=None,
         max_width=None,
         link=None,
+        wrap_algorithm="greedy",
     ):
         """
         Add styled text to the page at a specific position, with options for font, color,
@@ -159,43 +657,34 @@ class Page:
             background (str|tuple): Optional background color.
             max_width (float): Optional max width for wrapping text.
             link (str): Optional URL to link this text to.
+            wrap_algorithm (str): 'greedy' or 'optimal' line breaking when max_width is set.
         """
 
-        # Parse the color argument into a normalized RGB tuple (each value in [0,1])
-        def parse_color(c):
-            if isinstance(c, str):
-                if c.startswith("#"): # if it's a hex string
-                    return hex_to_rgb(c)
-                elif c.lower() in Page.color_MAP: # if the color is a name like "black" or "BlAcK", case doesn't matter then check in the color_MAP 
-                    return Page.color_MAP[c.lower()]
-                else:
-                    raise ValueError(f"Unknown color: {c}") # otherwise raise a value error
-            elif isinstance(c, (tuple, list)) and len(c) == 3: # if in rgb format
-                return tuple(c)
-            raise TypeError("color must be name, hex string, or (R,G,B) tuple")
+        buf = self.text_elements
 
-        # normalize RGB color to range [0, 1] for PDF color values
-        r, g, b = [max(0, min(255, int(c))) / 255 for c in parse_color(color)]
+        # resolve the colors once per call into their preformatted "r g b" operand strings (normalized to [0, 1]) and intern them in the page's text buffer
+        color_i = buf.intern_color(Page._resolve_color(color)[3])
+        bg_i = buf.intern_color(Page._resolve_color(background)[3]) if background else -1
+        # decorations are stored as bits and drawn when the page is serialized
+        flags = (TextBuf.UNDERLINE if underline else 0) | (TextBuf.STRIKE if strike else 0)
 
-        # Determine the correct font variant based on bold/italic flags
-        base_font = font.replace("-", "") # removes any dashes from the font name to normalize it like "Helvetica-Bold" becomes "HelveticaBold"
-        if bold and italic:
-            font_key = f"{base_font}BoldOblique"
-        elif bold:
-            font_key = f"{base_font}Bold"
-        elif italic:
-            font_key = f"{base_font}Oblique"
-        else:
-            font_key = base_font
-        font_ref = f"/{font_key}" # formats the font name into pdf syntax by prefixing it with a slash (ex. /HelveticaBoldOblique), which is how fonts are referenced in PDF content streams
+        # Determine the correct font variant based on bold/italic flags (computed once per combination)
+        font_key = (font, bold, italic)
+        font_ref = Page._FONT_REF_CACHE.get(font_key) or Page._compute_font_ref(font_key)
+        font_i = buf.intern_font(f"{font_ref} {size}")
 
         # Wrap text into lines if max_width is set, otherwise use the whole text
         
-        lines = self.wrap_text(text, max_width, size) if max_width else [text]
+        lines = _wrap_lines(text, max_width, size, wrap_algorithm) if max_width else (text,)
+        avg_char_width = 0.5 * size
+        text_height = size
+        # bounds of the padding box, hoisted out of the loop for the cut off check below
+        check_bounds = self.check_bounds
+        min_x, min_y = self.padding_h, self.padding_v
+        max_x = self.width - self.padding_h
+        max_y = self.height - self.padding_v - text_height
         for i, line in enumerate(lines):
-            avg_char_width = 0.5 * size
             text_width = len(line) * avg_char_width
-            text_height = size
             line_y = y - i * (size * 1.2)  # Adjust line position downwards per line
 
             # Adjust x position based on alignment
@@ -213,48 +702,16 @@ class Page:
                 line_x -= text_width
 
             # Check if text is within the padding box; warn if it's not to notify the user that the text may be cutoff so he may shift the x and y coordinates accordingly
-            if not (self.padding_h <= line_x <=
-                    self.width - self.padding_h - text_width and self.padding_v
-                    <= line_y <= self.height - self.padding_v - text_height):
+            if check_bounds and (line_x < min_x or line_x + text_width > max_x
+                                 or line_y < min_y or line_y > max_y):
                 print(
                     f"Warning: Text '{line}' at ({line_x:.1f}, {line_y:.1f}) "
                     f"may be cut off (width={text_width:.1f}, height={text_height:.1f}). "
                     f"Consider adjusting its position or padding.")
 
-            stream_parts = []
-            # draw background rectangle if specified
-            # this code first checks if a background color is set. If it is, it parses the color and converts it into normalized RGB values (between 0 and 1) using parse_color already defined above. It then adds PDF drawing commands to fill a rectangle behind the text. After that, it appends another instruction to set the text color and draw the actual text at the specified position with the chosen font and size
-            if background:
-                br, bg, bb = [
-                    max(0, min(255, int(c))) / 255
-                    for c in parse_color(background)
-                ]
-                stream_parts.append(
-                    f"{br:.3f} {bg:.3f} {bb:.3f} rg\n{line_x:.2f} {line_y - 0.2*size:.2f} {text_width:.2f} {text_height:.2f} re f"
-                )
-
-            # add text drawing instruction
-            stream_parts.append(
-                f"{r:.3f} {g:.3f} {b:.3f} rg\nBT {font_ref} {size} Tf {line_x:.2f} {line_y:.2f} Td ({line}) Tj ET"
-            )
-
-            # optionally add underline
-            if underline:
-                uy = line_y - size * 0.15 # calculates the Y-position of the underline, placing it slightly below the text baseline
-                stream_parts.append(
-                    f"{r:.3f} {g:.3f} {b:.3f} RG\n{line_x:.2f} {uy:.2f} m {line_x + text_width:.2f} {uy:.2f} l S"
-                    # the above code adds an underline to the text by inserting PDF drawing commands into the page’s content stream. Firstly, it sets the stroke color using the same RGB values as the text. Then it moves the drawing cursor to the starting position of the underline using m, and draws a horizontal line across the width of the text with l. Finally, the S command tells the PDF to actually render (or "stroke") the line. In simple terms, this block creates a clean underline beneath our text in the same color, matching the position and width of the text perfectly.
-                )
-
-            # optionally add strikethrough
-            if strike:
-                sy = line_y + size * 0.3 # y coordinate for strikethrough
-                stream_parts.append(
-                    f"{r:.3f} {g:.3f} {b:.3f} RG\n{line_x:.2f} {sy:.2f} m {line_x + text_width:.2f} {sy:.2f} l S"
-                )
-
-            # now add compiled PDF text stream to the page
-            self.text_elements.append("\n".join(stream_parts))
+            # store the line, the background rectangle, text and underline/strikethrough commands are built from these fields by TextBuf.serialize
+            buf.append(line_x, line_y, text_width, size, font_i, color_i, bg_i, flags,
+                       line.translate(_PDF_ESC).encode("latin1"))
 
             # Store link metadata for this text if any
             if link:
@@ -282,15 +739,15 @@ class Page:
             raise ValueError("Scale must be a positive number")
 
         # to track image usage by name if not already included
-        if name not in self.image_usages:
-            self.image_usages.append((name, None))
+        self.image_usages.setdefault(name, None)
 
         # compute final dimensions based on optional width/height and scale
         final_w = (w or 0) * scale
         final_h = (h or 0) * scale
 
         # Warn if image may overflow page bounds so that the user can modify the coordinates or size as needed 
-        if (x < self.padding_h or x + final_w > self.width - self.padding_h
+        if self.check_bounds and (
+                x < self.padding_h or x + final_w > self.width - self.padding_h
                 or y < self.padding_v
                 or y + final_h > self.height - self.padding_v):
             print(f"Warning: Image '{name}' at ({x:.1f}, {y:.1f}) "
@@ -308,7 +765,7 @@ class Page:
             image_sizes (dict): A dictionary mapping image names to (width, height) in points.
 
         Returns:
-            bytes: The compiled page content as PDF stream commands encoded in Latin-1.
+            bytearray: The compiled page content as PDF stream commands encoded in Latin-1.
 
         Raises:
             ValueError: If an image used on the page is missing from `image_sizes`.
@@ -340,11 +797,11 @@ class Page:
                     caption) * 0.5  # rough estimate of width
                 caption_x = x + (final_w - text_width) / 2
                 caption_y = y - 12  # position caption below image
-                caption_cmd = f"0 0 0 rg\nBT /Helvetica {font_size} Tf {caption_x:.2f} {caption_y:.2f} Td ({caption}) Tj ET"
+                caption_cmd = f"0 0 0 rg\nBT /Helvetica {font_size} Tf {caption_x:.2f} {caption_y:.2f} Td ({caption.translate(_PDF_ESC)}) Tj ET"
                 image_streams.append(caption_cmd)
 
-        # Combine all drawing commands (text + images) and encode as bytes
-        return "\n".join(self.text_elements + image_streams).encode("latin1")
+        # Combine all drawing commands (text + images) into one buffer, the text commands are already encoded. A bytearray join sizes the buffer once, and since it is mutable the page number can later be appended in place without copying the stream
+        return bytearray(b"\n").join(self.text_elements.serialize() + [cmd.encode("latin1") for cmd in image_streams])
 
 
 class PDF:
@@ -365,9 +822,27 @@ class PDF:
         """
         # initialize an empty list to hold Page instances
         self.pages = []
-        # list to store raw PDF objects (as bytes) to be written in the file
+        # objects waiting to be written in the file, as (object number, byte offset of the framed object in _spill)
         self.objects = []
-        # dictionary to store embedded images, keyed by internal name
+        # temporary file holding those objects already framed as "n 0 obj ... endobj", created on first use
+        self._spill = None
+        # number of objects allocated so far, object numbers are 1-based
+        self.object_count = 0
+        # output file while save() is running, objects added then are written straight to it
+        self._out = None
+        # byte offset of every written object, keyed by object number (used for the xref table)
+        self._offsets = {}
+        # number of bytes written to the output file so far, kept by hand so recording an offset doesn't need f.tell() (a seek system call)
+        self._pos = 0
+        # page dictionaries waiting for the page tree object number, as (object number, str template with a {pages} field)
+        self._pending_pages = []
+        # embedded image streams keyed by a content hash, so embedding the same image again reuses its object
+        self._img_hash_cache = {}
+        # results of embed_image keyed by (real path, modification time, compress), so re-embedding a file skips decoding it
+        self._img_cache = {}
+        # per-thread BytesIO reused across JPEG encodes (embed_images encodes from several threads)
+        self._jpeg_local = threading.local()
+        # dictionary to store embedded images as (object number, width, height), keyed by internal name
         self.images = {}
         # store dimensions of each page (width, height) in sequence
         self.page_dimensions = []
@@ -420,29 +895,62 @@ class PDF:
         # return the created page instance
         return page
 
-    def add_object(self, content: bytes):
+    def add_object(self, content, defer=False):
         """
         Adds a raw object (as bytes) to the PDF and returns its object number.
 
+        While the PDF is being saved the object is written to the file right away;
+        before that it is spilled to a temporary file (in memory while small, on disk
+        once it grows past 8 MiB) until save() is called.
+
         Args:
-            content (bytes): The raw bytes representing the PDF object.
+            content (bytes|str): The raw bytes representing the PDF object, or for a
+                deferred object a str template with a "{pages}" field.
+            defer (bool): Hold the object back until the page tree object number is
+                known (only page dictionaries need this).
 
         Returns:
             int: The object number assigned to this object.
         """
 
-        # Object number is just index + 1 since PDF objects are 1-based
-        obj_number = len(self.objects) + 1
+        # Object numbers are handed out sequentially since PDF objects are 1-based
+        self.object_count += 1
+        obj_number = self.object_count
 
-        # store the object number and content together
-        self.objects.append((obj_number, content))
+        if defer:
+            # keep the template until save() can fill in the {pages} reference
+            self._pending_pages.append((obj_number, content))
+        elif self._out is not None:
+            # the file is open, so write the object immediately instead of keeping it in memory
+            self._write_object(obj_number, content)
+        else:
+            # spill the object framed exactly as it will appear in the output, so save() copies it into the file and large image streams don't stay in RAM
+            if self._spill is None:
+                self._spill = SpooledTemporaryFile(max_size=_SPILL_MAX_SIZE)
+            spill = self._spill
+            spill.seek(0, os.SEEK_END)  # an earlier save() may have left the position elsewhere
+            self.objects.append((obj_number, spill.tell()))
+            spill.write(b"%d 0 obj\n" % obj_number + content + b"\nendobj\n")
 
         # return the object number for referencing elsewhere (e.g., page or image)
         return obj_number
 
+    def _write_object(self, obj_number, content):
+        """
+        Writes a single object to the open output file and records its byte offset.
+
+        Args:
+            obj_number (int): The object number.
+            content (bytes): The raw bytes representing the PDF object.
+        """
+        self._offsets[obj_number] = self._pos
+        # a single write per object instead of one each for the header, body and footer
+        self._pos += self._out.write(b"%d 0 obj\n" % obj_number + content + b"\nendobj\n")
+
     def embed_image(self, img_path, compress=False):
         """
         Embeds an image into the PDF, optionally compressing it with JPEG.
+        Embedding identical image data again returns the already embedded image.
 
         Args:
             img_path (str): Path to the image file.
@@ -455,23 +963,141 @@ class PDF:
                 - width in pixels (int),
                 - height in pixels (int)
 
+        Raises:
+            FileNotFoundError: If the image file does not exist.
+        """
+        # the same unchanged file embedded the same way again reuses the earlier result without decoding it
+        key = self._image_cache_key(img_path, compress)
+        if key in self._img_cache:
+            return self._img_cache[key]
+
+        result = self._add_image_object(*self._encode_image(img_path, compress))
+        self._img_cache[key] = result
+        return result
+
+    def embed_images(self, img_paths, compress=False):
+        """
+        Embeds several images at once, encoding them in parallel threads.
+
+        Pillow and the Flate compressor release the GIL while decoding and compressing, so the
+        encoding runs on multiple cores. Objects are still added in the order of
+        img_paths, giving the same object numbers as calling embed_image in a loop.
+
+        Args:
+            img_paths (list): Paths to the image files, or (path, compress) tuples to
+                choose the compression per image.
+            compress (bool): If True, compress the images using JPEG (for the plain paths).
+
+        Returns:
+            list: One (name, obj_number, width, height) tuple per entry of img_paths,
+            as returned by embed_image.
+
+        Raises:
+            FileNotFoundError: If an image file does not exist.
+        """
+        # plain paths use the compress argument, tuples bring their own
+        jobs = [item if isinstance(item, tuple) else (item, compress) for item in img_paths]
+
+        # only encode files that are not cached yet, each distinct (file, compress) once
+        keys = [self._image_cache_key(path, job_compress) for path, job_compress in jobs]
+        pending = {}
+        for job, key in zip(jobs, keys):
+            if key not in self._img_cache:
+                pending.setdefault(key, job)
+
+        with ThreadPoolExecutor(max_workers=os.cpu_count()) as executor:
+            encoded = dict(zip(pending, executor.map(lambda job: self._encode_image(*job), pending.values())))
+
+        # adding the objects stays serial so object numbering is deterministic
+        results = []
+        for key in keys:
+            if key not in self._img_cache:
+                self._img_cache[key] = self._add_image_object(*encoded[key])
+            results.append(self._img_cache[key])
+        return results
+
+    def _image_cache_key(self, img_path, compress):
+        """
+        Builds the key used to recognize an image file that was embedded before.
+
+        Args:
+            img_path (str): Path to the image file.
+            compress (bool): Whether JPEG compression is requested.
+
+        Returns:
+            tuple: (real path, modification time, compress), so a file that changed on
+            disk is embedded again.
+        """
+        real_path = os.path.realpath(img_path)
+        try:
+            mtime = os.path.getmtime(real_path)
+        except OSError:
+            # a missing file is reported by _encode_image with a clear error message
+            mtime = None
+        return real_path, mtime, bool(compress)
+
+    def _jpeg_buffer(self):
+        """
+        Returns the calling thread's reusable JPEG encode buffer, creating it on first use.
+
+        Returns:
+            BytesIO: The buffer (not rewound, callers reset it before use).
+        """
+        buf = getattr(self._jpeg_local, "buf", None)
+        if buf is None:
+            buf = self._jpeg_local.buf = BytesIO()
+        return buf
+
+    def _encode_image(self, img_path, compress):
+        """
+        Opens an image and builds its PDF image stream, without touching the PDF state.
+        The decoded image is not kept, only the encoded stream is returned.
+
+        Args:
+            img_path (str): Path to the image file.
+            compress (bool): If True, compress the image using JPEG.
+
+        Returns:
+            Tuple[bytes, int, int]: The image stream object bytes, and the width and
+            height in pixels.
+
         Raises:
             FileNotFoundError: If the image file does not exist.
         """
         try:
-            # open the image file and convert it to RGB mode
-            img = Image.open(img_path).convert("RGB")
+            # read the file once, a JPEG is embedded straight from these bytes
+            with open(img_path, "rb") as f:
+                file_data = f.read()
         except FileNotFoundError:
             # if the image file doesn't exist, raise a clear error
             raise FileNotFoundError(f"Image file '{img_path}' not found.")
 
+        # a JPEG source is copied through byte for byte whether or not compress is set: re-encoding would lose quality and deflating the decoded pixels only makes it bigger without adding any detail. Its header is parsed here, so Pillow isn't involved at all
+        jpeg = _jpeg_info(file_data)
+        if jpeg is not None:
+            # DCTDecode takes the original file data, grayscale JPEGs keep their single channel
+            width, height, color_space = jpeg
+            image_stream = (
+                f"<< /Type /XObject /Subtype /Image /Width {width} /Height {height} "
+                f"/ColorSpace {color_space} /BitsPerComponent 8 "
+                f"/Filter /DCTDecode /Length {len(file_data)} >>\n".encode() +
+                b"stream\n" + file_data + b"\nendstream")
+            return image_stream, width, height
+
+        # every other image is decoded by Pillow (converted to a PDF friendly mode below)
+        img = Image.open(BytesIO(file_data))
+
         # extract original image dimensions in pixels
         width, height = img.size
 
         # if compression is enabled, use JPEG format
         if compress:
-            # create a temporary buffer to hold the compressed JPEG data
-            img_buffer = BytesIO()
+            # JPEG data is always encoded from RGB
+            img = img.convert("RGB")
+            # reuse this thread's buffer to hold the compressed JPEG data instead of allocating one per image
+            img_buffer = self._jpeg_buffer()
+            img_buffer.seek(0)
+            img_buffer.truncate()
             # save the image in JPEG format with moderate compression (quality=85)
             img.save(img_buffer, format="JPEG", quality=85)
             # get raw byte data from buffer
@@ -484,34 +1110,193 @@ class PDF:
                 f"/Filter /DCTDecode /Length {len(img_data)} >>\n".encode() +
                 b"stream\n" + img_data + b"\nendstream")
         else:
-            # if no compression, get raw RGB byte data
-            img_data = img.tobytes()
+            # pick the narrowest color space that still holds the exact pixels, so fewer bytes go into the stream
+            palette = img.getpalette("RGB") if img.mode == "P" else None
+            if img.mode == "1":
+                # 1 bit per pixel black and white, rows are packed into whole bytes just like PDF expects
+                color_space, bits = "/DeviceGray", 1
+            elif img.mode == "L":
+                # 1 byte per pixel grayscale
+                color_space, bits = "/DeviceGray", 8
+            elif palette:
+                # 1 byte per pixel indexing into the image's RGB palette, written as a hex string
+                color_space = f"[/Indexed /DeviceRGB {len(palette) // 3 - 1} <{bytes(palette).hex()}>]"
+                bits = 8
+            else:
+                # photographs and every other mode are stored as 3 bytes per pixel RGB
+                img = img.convert("RGB")
+                color_space, bits = "/DeviceRGB", 8
+
+            # keep the exact pixels but deflate them losslessly, 8-bit gray and RGB pixels are first PNG "Up" filtered (difference to the row above), which deflates far better for photos and gradients
+            decode_parms = ""
+            if img.mode in ("L", "RGB"):
+                colors = len(img.getbands())
+                img_data = _flate(_png_up_filter(img))
+                decode_parms = f"/DecodeParms << /Predictor 15 /Colors {colors} /BitsPerComponent 8 /Columns {width} >> "
+            else:
+                img_data = _flate(img.tobytes())
             
-            # build uncompressed image stream (note: may increase PDF size)
+            # build lossless image stream (FlateDecode keeps the raw pixels several times smaller)
             image_stream = (
                 f"<< /Type /XObject /Subtype /Image /Width {width} /Height {height} "
-                f"/ColorSpace /DeviceRGB /BitsPerComponent 8 /Length {len(img_data)} >>\n"
+                f"/ColorSpace {color_space} /BitsPerComponent {bits} /Filter /FlateDecode {decode_parms}/Length {len(img_data)} >>\n"
                 .encode() + b"stream\n" + img_data + b"\nendstream")
 
+        return image_stream, width, height
+
+    def _add_image_object(self, image_stream, width, height):
+        """
+        Adds an encoded image stream to the PDF objects, reusing an identical one if
+        it was embedded before.
+
+        Args:
+            image_stream (bytes): The image stream object bytes.
+            width (int): Width in pixels.
+            height (int): Height in pixels.
+
+        Returns:
+            Tuple[str, int, int, int]: Image name, object number, width and height.
+        """
+        # if an identical image stream (same header and pixel data) was already embedded, reuse that object
+        key = hashlib.blake2b(image_stream, digest_size=16).digest()
+        if key in self._img_hash_cache:
+            return self._img_hash_cache[key]
+
         # add the image stream to the PDF objects and get its object number
         obj_num = self.add_object(image_stream)
 
         # create a unique image name (e.g., Im5 if object number is 5)
         name = f"Im{obj_num}"
 
-        # store the image metadata in the images dictionary for later use
-        self.images[name] = (img, obj_num, width, height)
+        # store the image metadata in the images dictionary for later use (not the decoded image, so its pixels can be freed as soon as the stream is built)
+        self.images[name] = (obj_num, width, height)
+        self._img_hash_cache[key] = (name, obj_num, width, height)
 
         # Return all necessary info: image name, object number, dimensions
         return name, obj_num, width, height
 
-    def save(self, filename, show_page_numbers=False):
+    def save(self, filename, show_page_numbers=False, compress_streams="fast"):
         """
         Saves the PDF to a file.
 
+        Objects are written to the file as soon as they are finalized, so only the
+        small page dictionaries are ever held in memory; embedded images are copied
+        over from the spill file they were written to when they were added. An
+        existing file is only replaced once the new document is complete: it is
+        written to a temporary file in the same directory (given the existing file's
+        permission bits) and renamed over it, so a failed save leaves the existing
+        file untouched. A symlink is followed and the file it points to is replaced.
+
         Args:
             filename (str): Output filename (e.g., 'document.pdf').
             show_page_numbers (bool): Whether to show page numbers on each page.
+            compress_streams (str): How page content streams are compressed: 'none'
+                (uncompressed), 'fast' (quickest Flate level) or 'best' (smallest output).
+
+        Raises:
+            ValueError: If compress_streams is not recognized or an image used on a
+                page was never embedded.
+        """
+        # check the option before anything is written
+        if compress_streams not in _STREAM_LEVELS:
+            raise ValueError(f"Unknown compress_streams mode: {compress_streams}")
+        stream_level = _STREAM_LEVELS[compress_streams]
+
+        # map image names to their PDF object numbers
+        image_objs = {
+            name: obj_num
+            for name, (obj_num, _, _) in self.images.items()
+        }
+        # map image names to their width and height
+        image_sizes = {
+            name: (w, h)
+            for name, (_, w, h) in self.images.items()
+        }
+
+        # resolve image object references inside each page
+        for page in self.pages:
+            for name in page.image_usages:
+                if name not in image_objs:
+                    raise ValueError(f"Image object for {name} not found.")
+                # associate the name with its object number
+                page.image_usages[name] = image_objs[name]
+
+        # objects written by an earlier save() were not kept, so numbering restarts after the held objects
+        self.object_count = len(self.objects)
+        self._offsets = {}
+        self._pending_pages = []
+
+        # write everything to the output PDF file, the large write buffer batches the many small objects (fonts, annotations, page dictionaries) into a few system calls while objects are still streamed rather than collected in memory
+        # write through a symlink to the file it points at, so the link itself is kept
+        target = os.path.realpath(filename)
+        try:
+            mode = stat.S_IMODE(os.stat(target).st_mode)
+        except FileNotFoundError:
+            mode = None
+        if mode is None:
+            # there is no existing file to protect, so the new one is written in place (with the usual permissions) and removed again if saving fails
+            tmp_filename = target
+            f = open(target, "wb", buffering=_WRITE_BUFFER_SIZE)
+        else:
+            # an existing file is only replaced once the new document is complete, a uniquely named temporary file next to it keeps concurrent saves apart and the rename atomic
+            fd, tmp_filename = mkstemp(suffix=".tmp", dir=os.path.dirname(target))
+            f = open(fd, "wb", buffering=_WRITE_BUFFER_SIZE)
+        try:
+            with f:
+                self._pos = f.write(b"%PDF-1.4\n")  # PDF version header
+                self._out = f
+                try:
+                    # copy the objects added before saving (embedded images) from the spill file, they keep their relative offsets
+                    if self._spill is not None:
+                        base = self._pos
+                        for obj_number, offset in self.objects:
+                            self._offsets[obj_number] = base + offset
+                        self._spill.seek(0)
+                        shutil.copyfileobj(self._spill, f, _SPILL_COPY_SIZE)
+                        self._pos += self._spill.tell()  # the copy stops at the end of the spill file, so its position is the number of bytes copied
+
+                    catalog_obj = self._write_body(image_sizes, show_page_numbers, stream_level)
+
+                    # write the xref table (index of all objects)
+                    offsets = [0] + [self._offsets[n] for n in range(1, self.object_count + 1)]
+                    xref_offset = self._pos
+                finally:
+                    self._out = None
+                    self._offsets = {}
+                    # the objects written by this save are not kept, so objects added afterwards are numbered right after the held ones (the numbers the next save gives them)
+                    self.object_count = len(self.objects)
+
+                # build the xref table and trailer in one buffer and write it once
+                # every entry is a fixed 20 byte record, all of them are formatted in one join
+                xref = bytearray(b"xref\n0 %d\n0000000000 65535 f \n" % len(offsets))  # free object entry for obj 0
+                xref += b"".join([b"%010d 00000 n \n" % offset for offset in offsets[1:]])
+
+                # trailer that tells PDF readers where to start
+                # (bytes %-formatting skips the str encode, "%%%%EOF" formats to the "%%EOF" end of file marker)
+                xref += b"trailer\n<< /Size %d /Root %d 0 R >>\nstartxref\n%d\n%%%%EOF\n" % (
+                    len(offsets), catalog_obj, xref_offset)
+                f.write(xref)
+            if mode is not None:
+                # mkstemp creates the file readable by the owner only, keep the permissions of the file being replaced
+                os.chmod(tmp_filename, mode)
+                os.replace(tmp_filename, target)
+        except BaseException:
+            os.remove(tmp_filename)
+            raise
+
+    def _write_body(self, image_sizes, show_page_numbers, stream_level):
+        """
+        Writes the fonts, page contents, annotations, page tree and catalog objects
+        to the open output file.
+
+        Args:
+            image_sizes (dict): Mapping of image names to (width, height).
+            show_page_numbers (bool): Whether to show page numbers on each page.
+            stream_level (int|None): Flate level for the page content streams, or None
+                to leave them uncompressed.
+
+        Returns:
+            int: The object number of the /Catalog (root) object.
         """
         # define font mapping for PDF standard fonts
         font_map = {
@@ -530,47 +1315,15 @@ class PDF:
             for k, v in font_map.items()
         }
 
-        # map image names to their PDF object numbers
-        image_objs = {
-            name: obj_num
-            for name, (_, obj_num, _, _) in self.images.items()
-        }
-        # map image names to their width and height
-        image_sizes = {
-            name: (w, h)
-            for name, (_, _, w, h) in self.images.items()
-        }
-
-        # resolve image object references inside each page
-        for page in self.pages:
-            for i, (name, _) in enumerate(page.image_usages):
-                if name not in image_objs:
-                    raise ValueError(f"Image object for {name} not found.")
-                # replace name with its associated object number
-                page.image_usages[i] = (name, image_objs[name])
+        # every page uses the same fonts, so their resource dictionary is written once and every page refers to it
+        font_resource_str = " ".join(f"/{k} {v} 0 R" for k, v in font_objs.items())
+        font_dict_obj = self.add_object(f"<< {font_resource_str} >>".encode())
 
         content_obj_nums = []
         for idx, page in enumerate(self.pages):
             # get the main PDF drawing commands for the page as byte stream
             stream = page.get_stream_bytes(image_sizes)
 
-            # add captions (labels under images), if any
-            for (name, x, y, w, h, scale, caption) in page.image_elements:
-                if caption:
-                    font_key = "Helvetica"
-                    font_size = 10
-                    text_width = font_size * len(
-                        caption) * 0.5  # Rough estimation
-                    caption_x = (x + (
-                        (w or image_sizes[name][0]) * scale - text_width) / 2)
-                    caption_y = y - 12  # draw caption below the image
-
-                    # add drawing commands for caption text
-                    caption_cmd = (
-                        f"\n0 0 0 rg\nBT /{font_key} {font_size} Tf {caption_x:.2f} {caption_y:.2f} Td ({caption}) Tj ET"
-                    ).encode()
-                    stream += caption_cmd
-
             # optionally show page numbers at the bottom center
             if show_page_numbers:
                 font_key = "Helvetica"
@@ -585,11 +1338,17 @@ class PDF:
                 extra = (
                     f"\n0 0 0 rg\nBT /{font_key} {font_size} Tf {x:.2f} {y:.2f} Td ({number_text}) Tj ET"
                 ).encode()
-                stream += extra
+                stream += extra  # extends the bytearray in place
+
+            # deflate the content stream unless compression is turned off or the stream is too small for it to pay off
+            filter_str = ""
+            if stream_level is not None and len(stream) > 512:
+                stream = _flate(stream, stream_level)
+                filter_str = "/Filter /FlateDecode "
 
             # wrap the stream content in a PDF stream object and store its reference
             stream_obj = self.add_object(
-                f"<< /Length {len(stream)} >>\nstream\n".encode() + stream +
+                f"<< {filter_str}/Length {len(stream)} >>\nstream\n".encode() + stream +
                 b"\nendstream")
             content_obj_nums.append(stream_obj)
 
@@ -598,15 +1357,11 @@ class PDF:
             page = self.pages[i]
             width, height = page.width, page.height
 
-            # Prepare font resources (all fonts used in this document)
-            font_resource_str = " ".join(f"/{k} {v} 0 R"
-                                         for k, v in font_objs.items())
-
             # Prepare XObject (images used on this page)
             xobj_str = ""
             if page.image_usages:
                 xobj_pairs = " ".join(f"/{name} {obj_num} 0 R"
-                                      for name, obj_num in page.image_usages)
+                                      for name, obj_num in page.image_usages.items())
                 xobj_str = f"/XObject << {xobj_pairs} >>"
 
             # create annotation objects for links and store their references
@@ -614,15 +1369,15 @@ class PDF:
             for x, y, w, h, uri in page.links:
                 annot_str = (
                     f"<< /Type /Annot /Subtype /Link /Rect [{x:.2f} {y:.2f} {x+w:.2f} {y+h:.2f}] "
-                    f"/Border [0 0 0] /A << /S /URI /URI ({uri}) >> >>")
+                    f"/Border [0 0 0] /A << /S /URI /URI ({uri.translate(_PDF_ESC)}) >> >>")
                 annot_obj = self.add_object(annot_str.encode())
                 annotations.append(f"{annot_obj} 0 R")
 
             # if any links exist, include them as annotation array
             annots_str = f"/Annots [{' '.join(annotations)}]" if annotations else ""
 
-            # combine all resource strings: fonts + images (XObjects)
-            resource_str = f"/Font << {font_resource_str} >>"
+            # combine all resource strings: fonts (the shared dictionary) + images (XObjects)
+            resource_str = f"/Font {font_dict_obj} 0 R"
             if xobj_str:
                 resource_str += f" {xobj_str}"
 
@@ -631,7 +1386,7 @@ class PDF:
                 f"<< /Type /Page /Parent {{pages}} 0 R /Resources << {resource_str} >> "
                 f"/Contents {content_ref} 0 R /MediaBox [0 0 {width:.2f} {height:.2f}] {annots_str} >>"
             )
-            page_obj = self.add_object(page_obj_str.encode())
+            page_obj = self.add_object(page_obj_str, defer=True)
             page_obj_nums.append(page_obj)
 
         # create the /Pages dictionary that holds all page objects
@@ -640,41 +1395,12 @@ class PDF:
             f"<< /Type /Pages /Kids [{kids}] /Count {len(page_obj_nums)} >>".
             encode())
 
-        # replace placeholder {pages} in objects with actual page tree object number
-        fixed_objects = []
-        for obj_number, data in self.objects:
-            if b"{pages}" in data:
-                data = data.replace(b"{pages}", str(pages_obj).encode())
-            fixed_objects.append((obj_number, data))
-        self.objects = fixed_objects
+        # now that the page tree object number is known, fill it into the held back page objects
+        for obj_number, template in self._pending_pages:
+            self._write_object(obj_number, template.format(pages=pages_obj).encode())
+        self._pending_pages = []
 
         # create the /Catalog object (PDF root object)
-        catalog_obj = self.add_object(
+        return self.add_object(
             f"<< /Type /Catalog /Pages {pages_obj} 0 R >>".encode())
 
-        # write everything to the output PDF file
-        with open(filename, "wb") as f:
-            f.write(b"%PDF-1.4\n")  # PDF version header
-
-            # write all objects and keep track of byte offsets
-            offsets = [0]
-            for obj_number, content in self.objects:
-                offsets.append(f.tell())
-                f.write(f"{obj_number} 0 obj\n".encode())
-                f.write(content)
-                f.write(b"\nendobj\n")
-
-            # write the xref table (index of all objects)
-            xref_offset = f.tell()
-            f.write(f"xref\n0 {len(offsets)}\n".encode())
-            f.write(b"0000000000 65535 f \n")  # free object entry for obj 0
-            for offset in offsets[1:]:
-                f.write(f"{offset:010d} 00000 n \n".encode())
-
-            # write trailer that tells PDF readers where to start
-            f.write(b"trailer\n")
-            f.write(f"<< /Size {len(offsets)} /Root {catalog_obj} 0 R >>\n".
-                    encode())
-            f.write(b"startxref\n")
-            f.write(f"{xref_offset}\n".encode())
-            f.write(b"%%EOF\n")  # End of file marker